@@ -7,15 +7,27 @@ Fetches team statistics, EPA rankings, and awards from The Blue Alliance and Sta
 import os
 import sys
 import logging
-from typing import Dict, List, Optional, Any
+import argparse
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 
-import tbaapiv3client
+import orjson
+import requests
+from cachetools import TTLCache
 from dotenv import load_dotenv
-from openpyxl import Workbook, load_workbook
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Alignment
+from openpyxl.utils import get_column_letter
+from requests.adapters import HTTPAdapter
+from requests_cache import DEFAULT_IGNORED_PARAMS, CachedSession
 from statbotics import Statbotics
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+from urllib3.util.retry import Retry
 
 # Configure logging
 logging.basicConfig(
@@ -27,6 +39,17 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Upper bound on TBA requests in flight at once, across all threads
+MAX_CONCURRENT_REQUESTS = 32
+
+# (connect, read) timeout in seconds for TBA requests, so a stalled socket
+# fails and is retried instead of holding a request slot forever
+REQUEST_TIMEOUT = (5, 30)
+
+# Cell alignments shared by every cell of the export workbook
+_WRAP = Alignment(wrap_text=True)
+_CENTER = Alignment(horizontal='center')
+
 
 @dataclass
 class Config:
@@ -43,6 +66,20 @@ class Config:
             raise ValueError("TBA_API_KEY not found in environment variables")
 
 
+@lru_cache(maxsize=1)
+def get_config() -> Config:
+    """Return the process-wide configuration, read from the environment once"""
+    return Config()
+
+
+def _is_transient(error: BaseException) -> bool:
+    """Whether a failed request is worth retrying (rate limit, server or network error)"""
+    if isinstance(error, requests.HTTPError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
 @dataclass
 class TeamStats:
     """Data structure for team statistics"""
@@ -58,24 +95,163 @@ class TeamStats:
 class FRCDataFetcher:
     """Main class for fetching FRC team data"""
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, pool_maxsize: int = 64,
+                 cache_name: str = 'frc_data_fetcher'):
+        """
+        Args:
+            config: API configuration
+            pool_maxsize: Keep-alive connections kept per host. Should be at
+                least the number of worker threads hitting the same host,
+                otherwise extra connections are opened and thrown away.
+            cache_name: SQLite file backing the persistent HTTP cache; relative
+                names are placed in the user cache directory (e.g. ~/.cache)
+        """
         self.config = config
         self.config.validate()
         
-        # Initialize TBA API client
-        tba_config = tbaapiv3client.Configuration(
-            host=self.config.tba_api_host,
-            api_key={'X-TBA-Auth-Key': self.config.tba_api_key}
+        # Retry dropped connections at the transport level only; rate limiting
+        # and server errors (even with Retry-After) are retried by _tba_get
+        retries = Retry(
+            total=3,
+            backoff_factor=0.5,
+            allowed_methods=('GET',),
+            respect_retry_after_header=False
+        )
+        
+        # Shared HTTP session so requests reuse keep-alive connections.
+        # Responses persist on disk for 6 hours (or as long as the server's
+        # Cache-Control allows), are revalidated with ETags once expired, and
+        # a stale copy is served for up to a day if the API is unreachable.
+        # The TBA key header is redacted so it never lands in the cache file.
+        self._session = CachedSession(
+            cache_name,
+            backend='sqlite',
+            use_cache_dir=True,
+            ignored_parameters=[*DEFAULT_IGNORED_PARAMS, 'X-TBA-Auth-Key'],
+            expire_after=timedelta(hours=6),
+            cache_control=True,
+            stale_if_error=timedelta(days=1)
         )
-        self.tba_client = tbaapiv3client.ApiClient(tba_config)
-        self.tba_event_api = tbaapiv3client.EventApi(self.tba_client)
-        self.tba_team_api = tbaapiv3client.TeamApi(self.tba_client)
+        self._session.mount('https://', HTTPAdapter(
+            pool_connections=pool_maxsize,
+            pool_maxsize=pool_maxsize,
+            max_retries=retries
+        ))
         
-        # Initialize Statbotics client
+        # Initialize Statbotics client on top of the shared session
         self.sb = Statbotics()
+        self.sb.session = self._session
+        
+        # Cache for parsed API responses, bounded so long-lived processes
+        # (e.g. the web server) don't grow without limit
+        self._cache: TTLCache = TTLCache(maxsize=10000, ttl=3600)
+        self._cache_lock = threading.RLock()
+        
+        # Caps concurrent TBA requests so wide worker pools don't trip rate limits
+        self._request_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
         
-        # Cache for API responses
-        self._cache: Dict[str, Any] = {}
+        # Requests currently in flight, keyed like the cache
+        self._inflight: Dict[tuple, Future] = {}
+        self._inflight_lock = threading.Lock()
+    
+    def __enter__(self) -> 'FRCDataFetcher':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """Release pooled HTTP connections"""
+        self._session.close()
+    
+    def clear_cache(self) -> None:
+        """Drop all cached API responses, both in memory and on disk"""
+        with self._cache_lock:
+            self._cache.clear()
+        self._session.cache.clear()
+    
+    def _cache_get(self, cache_key: tuple) -> Any:
+        """Return a cached value, or None if missing or expired"""
+        with self._cache_lock:
+            return self._cache.get(cache_key)
+    
+    def _cache_set(self, cache_key: tuple, value: Any) -> None:
+        """Store a value in the cache"""
+        with self._cache_lock:
+            self._cache[cache_key] = value
+    
+    def _get_or_fetch(self, cache_key: tuple, fetch: Callable[[], Any]) -> Any:
+        """
+        Return a cached value, fetching it at most once at a time
+        
+        Callers that ask for a key while another thread is already fetching
+        it wait for that result instead of sending a duplicate request.
+        Errors are passed on to the waiters but never cached.
+        
+        Args:
+            cache_key: Cache key for the value, e.g. ('sb', team_number, year)
+            fetch: Callable performing the actual request
+            
+        Returns:
+            The cached or freshly fetched value
+        """
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        with self._inflight_lock:
+            # Re-check, the value may have landed while waiting for the lock
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+            future = self._inflight.get(cache_key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._inflight[cache_key] = future
+        
+        if not is_owner:
+            return future.result()
+        
+        try:
+            value = fetch()
+            self._cache_set(cache_key, value)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[cache_key]
+    
+    @retry(
+        retry=retry_if_exception(_is_transient),
+        wait=wait_exponential_jitter(initial=1, max=30),
+        stop=stop_after_attempt(5),
+        reraise=True
+    )
+    def _tba_get(self, path: str) -> Any:
+        """
+        Issue a GET against the TBA REST API over the shared session
+        
+        Rate limiting (429), server errors and network failures are retried
+        with exponential backoff; any other error status raises HTTPError.
+        
+        Args:
+            path: Endpoint path (e.g., '/event/2024txhou/teams/simple')
+            
+        Returns:
+            Decoded JSON response as plain lists/dicts
+        """
+        with self._request_slots:
+            response = self._session.get(
+                self.config.tba_api_host + path,
+                headers={'X-TBA-Auth-Key': self.config.tba_api_key},
+                timeout=REQUEST_TIMEOUT
+            )
+        response.raise_for_status()
+        return orjson.loads(response.content)
     
     def get_event_teams(self, event_key: str) -> List[int]:
         """
@@ -87,19 +263,16 @@ class FRCDataFetcher:
         Returns:
             Sorted list of team numbers
         """
-        cache_key = f"teams_{event_key}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+        def fetch() -> List[int]:
+            response = self._tba_get(f'/event/{event_key}/teams/simple')
+            return sorted([team['team_number'] for team in response])
         
         try:
-            response = self.tba_event_api.get_event_teams_simple(
-                event_key,
-                if_modified_since='Cache-Control'
-            )
-            teams = sorted([team.team_number for team in response])
-            self._cache[cache_key] = teams
-            return teams
-        except Exception as e:
+            return self._get_or_fetch(('teams', event_key), fetch)
+        except requests.HTTPError as e:
+            # Only a missing resource means "no data"; anything else is a real failure
+            if e.response.status_code != 404:
+                raise
             logger.debug(f"No teams found for event {event_key}: {e}")
             return []
     
@@ -114,22 +287,67 @@ class FRCDataFetcher:
         Returns:
             TeamStats object with EPA and rank data
         """
-        cache_key = f"sb_{team_number}_{year}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-        
-        try:
+        def fetch() -> TeamStats:
             response = self.sb.get_team_year(team_number, year, ['epa'])
-            stats = TeamStats(
+            return TeamStats(
                 epa=round(response['epa']['total_points']['mean'], 2),
                 rank=response['epa']['ranks']['total']['rank']
             )
-            self._cache[cache_key] = stats
-            return stats
-        except Exception as e:
+        
+        try:
+            return self._get_or_fetch(('sb', team_number, year), fetch)
+        except (UserWarning, KeyError, TypeError) as e:
+            # Statbotics raises UserWarning for queries without data
             logger.debug(f"No Statbotics data for team {team_number} in {year}: {e}")
             return TeamStats.empty()
     
+    def prefetch_statbotics(self, teams: List[int], years: range) -> None:
+        """
+        Fill the cache with Statbotics data for many teams at once
+        
+        Issues one bulk request per year instead of one request per
+        team-year. Teams missing from a year's results did not compete
+        that year and are cached as empty stats.
+        
+        Args:
+            teams: FRC team numbers to cache
+            years: Competition years to fetch
+        """
+        wanted = set(teams)
+        if not wanted:
+            return
+        
+        for year in years:
+            try:
+                response = self.sb.get_team_years(
+                    year=year,
+                    limit=10000,
+                    fields=['team', 'epa']
+                )
+            except Exception as e:
+                logger.debug(f"No bulk Statbotics data for {year}: {e}")
+                continue
+            
+            listed = set()
+            for team_year in response:
+                team_number = team_year['team']
+                listed.add(team_number)
+                if team_number not in wanted:
+                    continue
+                try:
+                    stats = TeamStats(
+                        epa=round(team_year['epa']['total_points']['mean'], 2),
+                        rank=team_year['epa']['ranks']['total']['rank']
+                    )
+                except (KeyError, TypeError):
+                    # Not cached, so get_team_statbotics retries it individually
+                    continue
+                self._cache_set(('sb', team_number, year), stats)
+            
+            with self._cache_lock:
+                for team_number in wanted - listed:
+                    self._cache.setdefault(('sb', team_number, year), TeamStats.empty())
+    
     def get_team_events(self, team_number: int, year: int) -> List[str]:
         """
         Get list of events a team participated in during a year
@@ -141,18 +359,15 @@ class FRCDataFetcher:
         Returns:
             List of event keys
         """
-        cache_key = f"events_{team_number}_{year}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+        def fetch() -> List[str]:
+            return self._tba_get(f'/team/frc{team_number}/events/{year}/keys')
         
         try:
-            events = self.tba_team_api.get_team_events_by_year_keys(
-                f'frc{team_number}', 
-                year
-            )
-            self._cache[cache_key] = events
-            return events
-        except Exception as e:
+            return self._get_or_fetch(('events', team_number, year), fetch)
+        except requests.HTTPError as e:
+            # Only a missing resource means "no data"; anything else is a real failure
+            if e.response.status_code != 404:
+                raise
             logger.debug(f"No events found for team {team_number} in {year}: {e}")
             return []
     
@@ -167,22 +382,43 @@ class FRCDataFetcher:
         Returns:
             List of award descriptions
         """
-        cache_key = f"awards_{team_number}_{event_key}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+        def fetch() -> List[str]:
+            response = self._tba_get(f'/team/frc{team_number}/event/{event_key}/awards')
+            return [f"{award['event_key']} - {award['name']}" for award in response]
         
         try:
-            response = self.tba_event_api.get_team_event_awards(
-                f'frc{team_number}',
-                event_key
-            )
-            awards = [f"{award.event_key} - {award.name}" for award in response]
-            self._cache[cache_key] = awards
-            return awards
-        except Exception as e:
+            return self._get_or_fetch(('awards', team_number, event_key), fetch)
+        except requests.HTTPError as e:
+            # Only a missing resource means "no data"; anything else is a real failure
+            if e.response.status_code != 404:
+                raise
             logger.debug(f"No awards found for team {team_number} at {event_key}: {e}")
             return []
     
+    def get_team_year_awards(self, team_number: int, year: int) -> List[str]:
+        """
+        Get awards won by a team across all events in a year
+        
+        Args:
+            team_number: FRC team number
+            year: Competition year
+            
+        Returns:
+            List of award descriptions
+        """
+        def fetch() -> List[str]:
+            response = self._tba_get(f'/team/frc{team_number}/awards/{year}')
+            return [f"{award['event_key']} - {award['name']}" for award in response]
+        
+        try:
+            return self._get_or_fetch(('year_awards', team_number, year), fetch)
+        except requests.HTTPError as e:
+            # Only a missing resource means "no data"; anything else is a real failure
+            if e.response.status_code != 404:
+                raise
+            logger.debug(f"No awards found for team {team_number} in {year}: {e}")
+            return []
+    
     def fetch_team_year_data(self, team_number: int, year: int) -> Dict[str, Any]:
         """
         Fetch all data for a team in a specific year
@@ -198,11 +434,7 @@ class FRCDataFetcher:
         stats = self.get_team_statbotics(team_number, year)
         
         # Get awards from all events
-        events = self.get_team_events(team_number, year)
-        all_awards = []
-        for event in events:
-            awards = self.get_team_event_awards(team_number, event)
-            all_awards.extend(awards)
+        all_awards = self.get_team_year_awards(team_number, year)
         
         return {
             'epa': stats.epa,
@@ -219,6 +451,23 @@ class FRCDataFetcher:
             start_year: First year to fetch
             end_year: Last year to fetch (inclusive)
             
+        Returns:
+            List of data items for Excel row
+        """
+        years_data = [
+            self.fetch_team_year_data(team_number, year)
+            for year in range(start_year, end_year + 1)
+        ]
+        return self.build_team_row(team_number, years_data)
+    
+    def build_team_row(self, team_number: int, years_data: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Assemble an Excel row from per-year team data
+        
+        Args:
+            team_number: FRC team number
+            years_data: Results of fetch_team_year_data, oldest year first
+            
         Returns:
             List of data items for Excel row
         """
@@ -228,8 +477,7 @@ class FRCDataFetcher:
         total_impact_count = 0
         total_ei_count = 0
         
-        for year in range(start_year, end_year + 1):
-            year_data = self.fetch_team_year_data(team_number, year)
+        for year_data in years_data:
             total_win_count += year_data['awards'].count('Winner')
             total_finalist_count += year_data['awards'].count('Finalist')
             total_impact_count += year_data['awards'].count('FIRST Impact Award')
@@ -240,9 +488,72 @@ class FRCDataFetcher:
 
         return items
     
+    def fetch_teams_data(self, teams: List[int], start_year: int, end_year: int,
+                         max_workers: int = 32,
+                         progress_callback: Optional[Callable[[int, int], None]] = None
+                         ) -> Tuple[List[List[Any]], List[int]]:
+        """
+        Fetch multiple years of data for many teams in parallel
+        
+        Each (team, year) pair is its own unit of work, so one team's years
+        are fetched concurrently rather than one after another.
+        
+        Args:
+            teams: List of team numbers
+            start_year: First year to fetch
+            end_year: Last year to fetch (inclusive)
+            max_workers: Maximum number of parallel threads
+            progress_callback: Called with (completed, total) as work finishes
+            
+        Returns:
+            Tuple of (Excel rows sorted by team number, sorted team numbers
+            whose data could not be fetched and which have no row)
+        """
+        years = range(start_year, end_year + 1)
+        
+        # Bulk-load Statbotics data so per-team lookups hit the cache; each bulk
+        # call downloads a whole season, so don't bother without any teams
+        if teams:
+            self.prefetch_statbotics(teams, years)
+        
+        # Per-year results of teams still in progress, and finished rows
+        # preallocated for every team in output order (None until the team completes)
+        pending: Dict[int, Dict[int, Dict[str, Any]]] = {team: {} for team in teams}
+        rows: Dict[int, Optional[List[Any]]] = dict.fromkeys(sorted(teams))
+        failed_teams = set()
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Submit all tasks
+            futures = {
+                executor.submit(self.fetch_team_year_data, team, year): (team, year)
+                for team in teams
+                for year in years
+            }
+            
+            # Process completed tasks, building each row as soon as its team is done
+            for completed, future in enumerate(as_completed(futures), start=1):
+                team, year = futures[future]
+                
+                try:
+                    team_years = pending[team]
+                    team_years[year] = future.result()
+                    if len(team_years) == len(years):
+                        rows[team] = self.build_team_row(team, [team_years[y] for y in years])
+                        del pending[team]
+                except Exception as e:
+                    failed_teams.add(team)
+                    logger.error(f"Failed to fetch data for team {team} in {year}: {e}")
+                
+                if progress_callback:
+                    progress_callback(completed, len(futures))
+        
+        # Rows are already keyed in team order; teams with a failed year have no row
+        all_data = [row for row in rows.values() if row is not None]
+        return all_data, sorted(failed_teams)
+    
     def export_to_excel(self, event_year: int, event_code: str, 
                        teams: List[int], years_to_fetch: int, do_deep_search: bool,
-                       max_workers: int = 5) -> None:
+                       max_workers: int = 32) -> None:
         """
         Export all team data to Excel file with parallel processing
         
@@ -267,94 +578,72 @@ class FRCDataFetcher:
             os.remove(fullname)
             logger.info(f"Removed existing file: {filename}")
         
-        # Create workbook with headers
-        wb = Workbook()
-        ws = wb.active
-        ws.title = f"{event_year} {event_code} Data"
-        
-        # Create headers
-        headers = ['Team']
         start_year = event_year - years_to_fetch + 1
-        for year in range(start_year, event_year + 1):
-            headers.extend([f'{year} EPA', f'{year} Rank', f'{year} Awards'])
-        headers.extend(['Wins', 'Finalists', 'Impact', 'EI'])
-        ws.append(headers)
-        
-        # Adjust column widths for better readability
-        ws.column_dimensions['A'].width = 10 # Team number
-        for i in range(1, years_to_fetch + 1):
-            col_base = 1 + (i - 1) * 3
-            ws.column_dimensions[chr(65 + col_base)].width = 12  # EPA
-            ws.column_dimensions[chr(65 + col_base + 1)].width = 12  # Rank
-            ws.column_dimensions[chr(65 + col_base + 2)].width = 60  # Awards
-        for i in range (1 + years_to_fetch * 3, 1 + years_to_fetch + 5):
-            ws.column_dimensions[chr(65 + i)].width = 12 # Summary
-
-        # Enable text wrapping for better readability
-        for i in range(4, years_to_fetch * 3 + 4, 3):
-            for j in range(1, len(teams) + 2):
-                ws.cell(row=j, column=i).alignment = Alignment(wrap_text=True) # Awards
-
-        # Adjust text alignment for better readability
-        for i in [col for col in range(1, 1 + years_to_fetch * 3 + 5) if col not in [award_col for award_col in range(4, years_to_fetch * 3 + 4, 3)]]:
-            for j in range(1, len(teams) + 2):
-                ws.cell(row=j, column=i).alignment = Alignment(horizontal='center') # Team number, EPA, Rank, Summary
-        
-        wb.save(fullname)
         
         # Fetch data with progress tracking
         print(f"\nFetching data for {len(teams)} teams...")
-
-        all_data = []
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all tasks
-            futures = {
-                executor.submit(
-                    self.fetch_team_data, 
-                    team, 
-                    start_year, 
-                    event_year
-                ): team 
-                for team in teams
-            }
-            
-            # Process completed tasks
-            completed = 0
-            for future in as_completed(futures):
-                team = futures[future]
-                completed += 1
-                
-                try:
-                    data = future.result()
-                    
-                    # Write to Excel
-                    all_data.append(data)
-                    
-                    # Update progress
-                    progress = (completed / len(teams)) * 100
-                    print(f"Progress: {completed}/{len(teams)} teams ({progress:.1f}%)", end='\r')
-                    
-                except Exception as e:
-                    logger.error(f"Failed to fetch data for team {team}: {e}")
+        def report_progress(completed: int, total: int) -> None:
+            progress = (completed / total) * 100
+            print(f"Progress: {completed}/{total} team-years ({progress:.1f}%)", end='\r')
         
-        # Sort all data by team number
-        all_data.sort(key=lambda x: x[0])
+        all_data, failed_teams = self.fetch_teams_data(teams, start_year, event_year,
+                                                       max_workers, report_progress)
+        if failed_teams:
+            print(f"\n⚠ Could not fetch data for {len(failed_teams)} teams, left out of the export: {failed_teams}")
 
         # Export data to Excel
         print(f"\nExporting data to {filename}...")
 
-        wb = load_workbook(fullname)
-        ws = wb.active
+        write_team_workbook(fullname, f"{event_year} {event_code} Data",
+                            start_year, event_year, all_data)
 
-        # Write data to cell separately since the cells are already created (thus appending will result in wrong position)
-        for row in range(1, len(all_data) + 1):
-            for col in range(1, len(all_data[row - 1]) + 1):
-                ws.cell(row + 1, col).value = all_data[row - 1][col - 1]
+        print(f"✓ Data export complete: {filename}")
 
-        wb.save(fullname)
 
-        print(f"✓ Data export complete: {filename}")
+def write_team_workbook(fullname: str, title: str, start_year: int, end_year: int,
+                        rows: List[List[Any]]) -> None:
+    """
+    Write team rows to a formatted Excel file in a single save
+    
+    Args:
+        fullname: Path of the Excel file to write
+        title: Worksheet title
+        start_year: First year of history in each row
+        end_year: Last year of history in each row (inclusive)
+        rows: Rows as returned by FRCDataFetcher.fetch_team_data, in output order
+    """
+    years_to_fetch = end_year - start_year + 1
+    
+    # Write-only mode streams rows out instead of keeping every cell in memory
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=title)
+    
+    # Set column widths (must precede any rows) and per-column alignment in one pass:
+    # wrap the award columns, center everything else
+    award_cols = range(3, years_to_fetch * 3 + 3, 3)
+    ws.column_dimensions['A'].width = 10 # Team number
+    alignments = [_CENTER]
+    for col in range(1, years_to_fetch * 3 + 5):
+        is_award = col in award_cols
+        ws.column_dimensions[get_column_letter(col + 1)].width = 60 if is_award else 12 # Awards / EPA, Rank, Summary
+        alignments.append(_WRAP if is_award else _CENTER)
+    
+    # Create headers
+    headers = ['Team']
+    for year in range(start_year, end_year + 1):
+        headers.extend([f'{year} EPA', f'{year} Rank', f'{year} Awards'])
+    headers.extend(['Wins', 'Finalists', 'Impact', 'EI'])
+    
+    for row in [headers, *rows]:
+        cells = []
+        for value, alignment in zip(row, alignments):
+            cell = WriteOnlyCell(ws, value=value)
+            cell.alignment = alignment
+            cells.append(cell)
+        ws.append(cells)
+    
+    wb.save(fullname)
 
 
 def get_user_input() -> tuple:
@@ -398,41 +687,57 @@ def get_user_input() -> tuple:
             sys.exit(0)
 
 
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--refresh',
+        action='store_true',
+        help='clear cached API responses before fetching'
+    )
+    return parser.parse_args()
+
+
 def main():
     """Main execution function"""
+    args = parse_args()
     try:
         # Get user input
         event_year, event_code_list, self_team_number, years_to_fetch, do_deep_search, deep_search_years = get_user_input()
         
         # Initialize fetcher
-        config = Config()
-        fetcher = FRCDataFetcher(config)
+        config = get_config()
         
-        for event_code in event_code_list:
-            # Construct full event key
-            event_key = f"{event_year}{event_code}"
+        with FRCDataFetcher(config) as fetcher:
+            if args.refresh:
+                fetcher.clear_cache()
+                print("Cleared cached API responses")
             
-            # Fetch teams
-            teams = []
-            if do_deep_search:
-                print(f"\nFetching teams for {event_code} (this may take a long time)...")
-                for year in range(event_year - deep_search_years + 1, event_year + 1):
-                    year_event_key = f"{year}{event_code}"
-                    teams.extend(fetcher.get_event_teams(year_event_key))
-                teams = list(set(teams)) # Remove duplicates
-            else:
-                print(f"\nFetching teams for {event_key}...")
-                teams.extend(fetcher.get_event_teams(event_key))
-                print(f"Found {len(teams)} teams: {teams[:5]}{'...' if len(teams) > 5 else ''}")
+            for event_code in event_code_list:
+                # Construct full event key
+                event_key = f"{event_year}{event_code}"
+            
+                # Fetch teams
+                teams = []
+                if do_deep_search:
+                    print(f"\nFetching teams for {event_code} (this may take a long time)...")
+                    for year in range(event_year - deep_search_years + 1, event_year + 1):
+                        year_event_key = f"{year}{event_code}"
+                        teams.extend(fetcher.get_event_teams(year_event_key))
+                    teams = list(set(teams)) # Remove duplicates
+                else:
+                    print(f"\nFetching teams for {event_key}...")
+                    teams.extend(fetcher.get_event_teams(event_key))
+                    print(f"Found {len(teams)} teams: {teams[:5]}{'...' if len(teams) > 5 else ''}")
             
-            # Highlight self team if provided
-            if self_team_number in teams:
-                print(f"✓ Your team ({self_team_number}) is registered for this event")
-            elif self_team_number > 0:
-                print(f"✗ Your team ({self_team_number}) is not registered for this event")
+                # Highlight self team if provided
+                if self_team_number in teams:
+                    print(f"✓ Your team ({self_team_number}) is registered for this event")
+                elif self_team_number > 0:
+                    print(f"✗ Your team ({self_team_number}) is not registered for this event")
             
-            # Export data
-            fetcher.export_to_excel(event_year, event_code, teams, years_to_fetch, do_deep_search)
+                # Export data
+                fetcher.export_to_excel(event_year, event_code, teams, years_to_fetch, do_deep_search)
         
     except KeyboardInterrupt:
         print("\n\nOperation cancelled by user")
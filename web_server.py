@@ -5,16 +5,18 @@ Web interface for the FRC Event Data Fetcher with download capabilities
 """
 
 import os
+import json
 import threading
 import queue
 import time
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, render_template, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
+from cachetools import TTLCache
 import secrets
 
 # Import the main fetcher module
-from frc_data_fetcher import FRCDataFetcher, Config
+from frc_data_fetcher import FRCDataFetcher, get_config, write_team_workbook
 
 app = Flask(__name__)
 app.secret_key = secrets.token_hex(16)
@@ -22,11 +24,26 @@ CORS(app)
 
 # Global variables for progress tracking
 progress_queue = queue.Queue()
-current_tasks = {}
+current_tasks = TTLCache(maxsize=512, ttl=7200)  # Forget tasks after 2 hours
+tasks_lock = threading.RLock()
+
+# Fetcher shared by all tasks so they reuse connections and cached responses
+_fetcher = None
+_fetcher_lock = threading.Lock()
 
 # HTML template with modern UI
 template_name = 'web_server.html'
 
+
+def get_fetcher():
+    """Return the shared fetcher, creating it on first use"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = FRCDataFetcher(get_config())
+        return _fetcher
+
+
 class FetchTask(threading.Thread):
     """Background task for fetching FRC data"""
     
@@ -40,11 +57,44 @@ class FetchTask(threading.Thread):
         self.detail = ''
         self.filename = None
         
+        # Bumped and broadcast on every change so progress streams can wait on it
+        self.version = 0
+        self.changed = threading.Condition()
+    
+    def update(self, **fields):
+        """Set progress fields and wake up anyone waiting for changes"""
+        with self.changed:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.version += 1
+            self.changed.notify_all()
+    
+    def snapshot(self):
+        """Current progress as a JSON-serializable dict"""
+        with self.changed:
+            return {
+                'status': self.status,
+                'progress': self.progress,
+                'message': self.message,
+                'detail': self.detail,
+                'filename': self.filename
+            }
+    
+    def wait_for_update(self, seen_version, timeout):
+        """
+        Block until the task changes past seen_version or timeout expires
+        
+        Returns:
+            (snapshot, version), or (None, seen_version) on timeout
+        """
+        with self.changed:
+            if not self.changed.wait_for(lambda: self.version != seen_version, timeout):
+                return None, seen_version
+            return self.snapshot(), self.version
+        
     def run(self):
         try:
-            # Initialize fetcher
-            config = Config()
-            fetcher = FRCDataFetcher(config)
+            fetcher = get_fetcher()
             
             event_year = self.params['event_year']
             event_codes = self.params['event_codes']
@@ -54,6 +104,7 @@ class FetchTask(threading.Thread):
             deep_search_years = self.params['deep_search_years']
             
             total_events = len(event_codes)
+            missing = []  # Per-event notes on teams left out of the export
             
             for idx, event_code in enumerate(event_codes):
                 base_progress = (idx / total_events) * 100
@@ -62,51 +113,52 @@ class FetchTask(threading.Thread):
                 event_key = f"{event_year}{event_code}"
                 
                 # Update progress
-                self.message = f"Processing event {event_code} ({idx + 1}/{total_events})"
-                self.progress = base_progress
+                self.update(message=f"Processing event {event_code} ({idx + 1}/{total_events})",
+                            progress=base_progress)
                 
                 # Fetch teams
                 teams = []
                 if deep_search:
-                    self.detail = f"Deep searching {event_code} across {deep_search_years} years..."
+                    self.update(detail=f"Deep searching {event_code} across {deep_search_years} years...")
                     for year in range(event_year - deep_search_years + 1, event_year + 1):
                         year_event_key = f"{year}{event_code}"
                         year_teams = fetcher.get_event_teams(year_event_key)
                         teams.extend(year_teams)
                         sub_progress = ((year - (event_year - deep_search_years + 1)) / deep_search_years) * (100 / total_events)
-                        self.progress = base_progress + sub_progress * 0.3
+                        self.update(progress=base_progress + sub_progress * 0.3)
                     teams = list(set(teams))  # Remove duplicates
                 else:
-                    self.detail = f"Fetching teams for {event_key}..."
+                    self.update(detail=f"Fetching teams for {event_key}...")
                     teams = fetcher.get_event_teams(event_key)
                 
                 if not teams:
-                    self.detail = f"No teams found for {event_key}"
+                    self.update(detail=f"No teams found for {event_key}")
                     continue
                 
                 # Create custom export method with progress callback
-                self.detail = f"Fetching data for {len(teams)} teams..."
-                self.export_with_progress(fetcher, event_year, event_code, teams, 
-                                         years_to_fetch, deep_search, base_progress, 
-                                         100 / total_events)
+                self.update(detail=f"Fetching data for {len(teams)} teams...")
+                failed_teams = self.export_with_progress(fetcher, event_year, event_code, teams, 
+                                                         years_to_fetch, deep_search, base_progress, 
+                                                         100 / total_events)
+                if failed_teams:
+                    missing.append(f"{event_code}: {', '.join(map(str, failed_teams))}")
                 
-                self.filename = f"{event_year}{event_code}{'_deep' if deep_search else ''}.xlsx"
+                self.update(filename=f"{event_year}{event_code}{'_deep' if deep_search else ''}.xlsx")
             
-            self.status = 'completed'
-            self.progress = 100
-            self.message = 'Data fetch completed successfully!'
+            if missing:
+                self.update(status='completed', progress=100,
+                            message=f"Data fetch completed, but these teams could not be fetched "
+                                    f"and are missing from the file ({'; '.join(missing)}).")
+            else:
+                self.update(status='completed', progress=100,
+                            message='Data fetch completed successfully!')
             
         except Exception as e:
-            self.status = 'error'
-            self.message = str(e)
+            self.update(status='error', message=str(e))
     
     def export_with_progress(self, fetcher, event_year, event_code, teams, 
                             years_to_fetch, deep_search, base_progress, progress_range):
         """Modified export method with progress updates"""
-        import concurrent.futures
-        from openpyxl import Workbook, load_workbook
-        from openpyxl.styles import Alignment
-        
         foldername = "output"
         filename = f"{event_year}{event_code}{'_deep' if deep_search else ''}.xlsx"
         fullname = os.path.join(foldername, filename)
@@ -119,78 +171,21 @@ class FetchTask(threading.Thread):
         if os.path.exists(fullname):
             os.remove(fullname)
         
-        # Create workbook with headers
-        wb = Workbook()
-        ws = wb.active
-        ws.title = f"{event_year} {event_code} Data"
-        
-        # Create headers
-        headers = ['Team']
         start_year = event_year - years_to_fetch + 1
-        for year in range(start_year, event_year + 1):
-            headers.extend([f'{year} EPA', f'{year} Rank', f'{year} Awards'])
-        headers.extend(['Wins', 'Finalists', 'Impact', 'EI'])
-        ws.append(headers)
         
-        # Adjust column widths for better readability
-        ws.column_dimensions['A'].width = 10 # Team number
-        for i in range(1, years_to_fetch + 1):
-            col_base = 1 + (i - 1) * 3
-            ws.column_dimensions[chr(65 + col_base)].width = 12  # EPA
-            ws.column_dimensions[chr(65 + col_base + 1)].width = 12  # Rank
-            ws.column_dimensions[chr(65 + col_base + 2)].width = 60  # Awards
-        for i in range (1 + years_to_fetch * 3, 1 + years_to_fetch + 5):
-            ws.column_dimensions[chr(65 + i)].width = 12 # Summary
-
-        # Enable text wrapping for better readability
-        for i in range(4, years_to_fetch * 3 + 4, 3):
-            for j in range(1, len(teams) + 2):
-                ws.cell(row=j, column=i).alignment = Alignment(wrap_text=True) # Awards
-
-        # Adjust text alignment for better readability
-        for i in [col for col in range(1, 1 + years_to_fetch * 3 + 5) if col not in [award_col for award_col in range(4, years_to_fetch * 3 + 4, 3)]]:
-            for j in range(1, len(teams) + 2):
-                ws.cell(row=j, column=i).alignment = Alignment(horizontal='center') # Team number, EPA, Rank, Summary
-        
-        wb.save(fullname)
+        def report_progress(completed, total):
+            team_progress = (completed / total) * progress_range * 0.7
+            self.update(progress=base_progress + progress_range * 0.3 + team_progress,
+                        detail=f"Processed {completed}/{total} team-years")
         
         # Fetch data with progress tracking
-        all_data = []
-        completed = 0
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            futures = {
-                executor.submit(fetcher.fetch_team_data, team, start_year, event_year): team 
-                for team in teams
-            }
-            
-            for future in concurrent.futures.as_completed(futures):
-                team = futures[future]
-                completed += 1
-                
-                try:
-                    data = future.result()
-                    all_data.append(data)
-                    
-                    # Update progress
-                    team_progress = (completed / len(teams)) * progress_range * 0.7
-                    self.progress = base_progress + progress_range * 0.3 + team_progress
-                    self.detail = f"Processed {completed}/{len(teams)} teams"
-                    
-                except Exception as e:
-                    print(f"Failed to fetch data for team {team}: {e}")
-        
-        # Sort and write data
-        all_data.sort(key=lambda x: x[0])
-        
-        wb = load_workbook(fullname)
-        ws = wb.active
+        all_data, failed_teams = fetcher.fetch_teams_data(teams, start_year, event_year,
+                                                          progress_callback=report_progress)
         
-        for row in range(1, len(all_data) + 1):
-            for col in range(1, len(all_data[row - 1]) + 1):
-                ws.cell(row + 1, col).value = all_data[row - 1][col - 1]
+        write_team_workbook(fullname, f"{event_year} {event_code} Data",
+                            start_year, event_year, all_data)
         
-        wb.save(fullname)
+        return failed_teams
 
 
 @app.route('/')
@@ -207,7 +202,8 @@ def start_fetch():
     
     # Create and start background task
     task = FetchTask(task_id, data)
-    current_tasks[task_id] = task
+    with tasks_lock:
+        current_tasks[task_id] = task
     task.start()
     
     return jsonify({'task_id': task_id})
@@ -216,18 +212,38 @@ def start_fetch():
 @app.route('/api/progress/<task_id>')
 def get_progress(task_id):
     """Get progress of a fetch task"""
-    if task_id in current_tasks:
-        task = current_tasks[task_id]
-        return jsonify({
-            'status': task.status,
-            'progress': task.progress,
-            'message': task.message,
-            'detail': task.detail,
-            'filename': task.filename
-        })
+    with tasks_lock:
+        task = current_tasks.get(task_id)
+    if task is not None:
+        return jsonify(task.snapshot())
     return jsonify({'status': 'error', 'message': 'Task not found'})
 
 
+@app.route('/api/progress-stream/<task_id>')
+def stream_progress(task_id):
+    """Push progress of a fetch task as Server-Sent Events whenever it changes"""
+    with tasks_lock:
+        task = current_tasks.get(task_id)
+    
+    def generate():
+        if task is None:
+            yield f"data: {json.dumps({'status': 'error', 'message': 'Task not found'})}\n\n"
+            return
+        
+        version = -1
+        while True:
+            state, version = task.wait_for_update(version, timeout=15)
+            if state is None:
+                yield ": keep-alive\n\n"  # Comment line, stops proxies timing out
+                continue
+            yield f"data: {json.dumps(state)}\n\n"
+            if state['status'] != 'running':
+                return
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
+
 @app.route('/api/files')
 def list_files():
     """List all available Excel files"""